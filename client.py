@@ -1,70 +1,123 @@
 import random
-from server import Block, Bucket
+import re
+from server import BLOCK_DTYPE
 import os
-from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+import numpy as np
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 
 
-def deserialize_block(block_data):
+def _plan_eviction_py(addresses, leaves, x, L, Z):
     """
-    function to deserialize a block from bytes representation
-    :param block_data: the bytes representation of the block's data
-    :return: the deserialized block object
+    greedy leaf-to-root eviction planning: bucket each stash block by its
+    depth bound (leaf ^ x).bit_length() and drop it into the deepest level
+    of the write-back path that still has a free slot
+    :param addresses: stash block addresses
+    :param leaves: the leaf mapped to each address, same order
+    :param x: the leaf of the path being written back
+    :param L: height of the tree
+    :param Z: bucket capacity
+    :return: list of L+1 address lists, leaf to root
     """
-    a = int.from_bytes(block_data[0:4], 'big')
-    x = int.from_bytes(block_data[4:8], 'big')
-    data = block_data[8:12].decode('utf-8')
-    flag = block_data[12:13] == b'1'
-    return Block(a, x, data, flag)
+    diff_bits = {blk_a: (leaf ^ x).bit_length() for blk_a, leaf in zip(addresses, leaves)}
+    level_addresses = [[] for _ in range(L + 1)]
+    for blk_a in sorted(addresses, key=diff_bits.__getitem__):
+        level = diff_bits[blk_a]
+        while level <= L and len(level_addresses[level]) >= Z:
+            level += 1
+        if level <= L:
+            level_addresses[level].append(blk_a)
+    return level_addresses
+
+
+# prefer the Cython-compiled kernel when it has been built (see setup.py)
+try:
+    from client_core import plan_eviction
+except ImportError:
+    plan_eviction = _plan_eviction_py
+
+
+def _has_aes_ni():
+    """
+    check whether the CPU advertises AES-NI; without it software AES and
+    table-based GHASH dominate the per-path encryption cost
+    :return: True if the aes flag is present (assumed when unprobeable)
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            return re.search(r'\baes\b', f.read()) is not None
+    except OSError:
+        return True
 
 
 class Client:
     def __init__(self, server):
-        # initialize empty stash
-        self.stash = []
-        # initialize position map, mapping each block to a random leaf
-        self.position_map = {block: random.randint(0, pow(2, server.L) - 1) for block in range(server.N)}
-        # generate key and cipher for each bucket in server's tree
-        self.keys = [AESGCM.generate_key(128) for _ in range(server.num_of_buckets)]
-        self.aesgcm_ciphers = [AESGCM(k) for k in self.keys]
-        # store nonces per bucket (use to randomize the encryption)
-        self.nonces = []
-        # fills every bucket with encrypted dummy blocks and uploads them to the server
+        # initialize empty stash, mapping address a -> data (the block's leaf
+        # always comes from the position map, which may be newer); dummy
+        # blocks are never admitted, so no clearing pass is needed
+        self.stash = {}
+        # initialize position map, mapping each block to a random leaf; a flat
+        # uint32 array indexed by address instead of a dict (no hashing, ~25x
+        # less memory)
+        self.position_map = np.random.randint(0, pow(2, server.L), size=server.N, dtype=np.uint32)
+        # dedicated RNG for leaf remaps; 2^L is a power of two so getrandbits
+        # replaces randint's rejection sampling
+        self._rng = random.Random()
+        # generate the key used for all bucket encryptions; prefer AES-GCM
+        # when the CPU has AES-NI, else fall back to ChaCha20-Poly1305 whose
+        # tiny-buffer cost is far lower without hardware AES
+        self.use_chacha = not _has_aes_ni()
+        if self.use_chacha:
+            self.key = ChaCha20Poly1305.generate_key()
+            self.chacha = ChaCha20Poly1305(self.key)
+        else:
+            self.key = os.urandom(16)
+        # serialized bucket size: count byte plus up to Z fixed-width records
+        self.bucket_plain = server.bucket_plain
+        # encode per-bucket AADs once instead of per seal/open call
+        self.bucket_aads = [f"bucket_{i}".encode('utf-8') for i in range(server.num_of_buckets)]
+        # fills every bucket with encrypted dummy blocks and uploads them to
+        # the server; one urandom syscall for all nonces instead of one each
+        nonce_pool = os.urandom(12 * server.num_of_buckets)
+        # an empty bucket is just a zero count byte plus padding — one shared
+        # constant instead of rebuilding (or ever allocating dummy blocks) per
+        # bucket
+        empty_bucket = bytes(self.bucket_plain)
         for i in range(server.num_of_buckets):
-            nonce = os.urandom(12)
-            self.nonces.append(nonce)
-            dummy_bucket = Bucket([], server.Z, server.N, True)
-            # create string data to encrypt the blocks together
-            data_to_encrypt = b"||".join([block.serialize() for block in dummy_bucket.blocks])
-            # authentication based on bucket's number
-            data_to_authenticate = f"bucket_{i}".encode('utf-8')
+            nonce = nonce_pool[12 * i:12 * i + 12]
             # write to server
-            server.tree[i] = self.aesgcm_ciphers[i].encrypt(nonce, data_to_encrypt, data_to_authenticate)
+            server.write_bucket(i, self._seal_bucket(i, nonce, empty_bucket))
 
-    def get_path_leaf_to_root(self, leaf_index, L):
+    def _seal_bucket(self, i, nonce, plaintext):
         """
-        Returns the path from the leaf node to the root in a full binary tree (array representation).
-
-        Parameters:
-        - leaf_index (int): The index of the leaf (0 to 2^L - 1).
-        - L (int): The height (L) of the tree.
-
-        Returns:
-        - List[int]: The path from leaf to root in the array representation of the tree.
+        AEAD-encrypt one serialized bucket, authenticated against bucket i's
+        AAD, going through the low-level Cipher API on the AES path so no
+        per-call AESGCM object is built
+        :return: nonce || tag || ciphertext record stored in the server's tree
         """
-        # Compute index of the leaf in the array representation
-        total_nodes = pow(2, (L + 1)) - 1
-        first_leaf_index = total_nodes - pow(2, L)
-        i = first_leaf_index + leaf_index
-
-        path = []
-        while i >= 0:
-            path.append(i)
-            if i != 0:
-                i = (i - 1) // 2  # Move to parent
-            else:
-                break
-
-        return path
+        if self.use_chacha:
+            sealed = self.chacha.encrypt(nonce, plaintext, self.bucket_aads[i])
+            return nonce + sealed[-16:] + sealed[:-16]
+        encryptor = Cipher(algorithms.AES(self.key), modes.GCM(nonce), backend=default_backend()).encryptor()
+        encryptor.authenticate_additional_data(self.bucket_aads[i])
+        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        return nonce + encryptor.tag + ciphertext
+
+    def _open_bucket(self, i, record):
+        """
+        AEAD-decrypt one nonce || tag || ciphertext record from the server's
+        tree, verifying the tag against bucket i's AAD (raises InvalidTag on
+        tampering, as the one-shot AESGCM path did)
+        :return: the serialized bucket plaintext
+        """
+        nonce, tag = bytes(record[:12]), bytes(record[12:28])
+        ciphertext = record[28:]
+        if self.use_chacha:
+            return self.chacha.decrypt(nonce, bytes(ciphertext) + tag, self.bucket_aads[i])
+        decryptor = Cipher(algorithms.AES(self.key), modes.GCM(nonce, tag), backend=default_backend()).decryptor()
+        decryptor.authenticate_additional_data(self.bucket_aads[i])
+        return decryptor.update(ciphertext) + decryptor.finalize()
 
     def Access(self, op, a, data_, server):
         """
@@ -75,99 +128,82 @@ class Client:
         """
 
         """Remap block: Randomly remap the position of block a to a new random position (corresponding leaf)"""
-        x = self.position_map[a]
-        new_x = random.randint(0, pow(2, server.L) - 1)
+        x = int(self.position_map[a])
+        new_x = self._rng.getrandbits(server.L)
         self.position_map[a] = new_x
 
         """Read the path P(x) containing block a"""
         i = 0
-        for bit in str(bin(x))[2:].zfill(server.L):
+        path_down = [0]  # bucket indices root to leaf, reused for write-back
+        for d in range(server.L):
             # read whole bucket (all blocks in it) to stash
             """decrypt bucket as a whole"""
-            # use cipher to decrypt the encrypted bucket (server.tree[i]])
-            cur_bucket_in_bytes = server.tree[i]
-            data_to_authenticate = f"bucket_{i}".encode('utf-8')
-            decrypted_bucket = self.aesgcm_ciphers[i].decrypt(self.nonces[i], cur_bucket_in_bytes, data_to_authenticate)
-            # add blocks to stash
-            self.stash += [deserialize_block(block) for block in decrypted_bucket.split(b"||")]
-            if bit == '0':  # go to left child
-                i = 2*i + 1
-            else:  # go to right child
-                i = 2*i + 2
+            # use cipher to decrypt the encrypted bucket
+            cur_bucket_in_bytes = server.read_bucket(i)
+            decrypted_bucket = self._open_bucket(i, cur_bucket_in_bytes)
+            # parse only the real blocks announced by the count prefix
+            blocks = np.frombuffer(decrypted_bucket, dtype=BLOCK_DTYPE,
+                                   count=decrypted_bucket[0], offset=1)
+            for blk in blocks.tolist():
+                self.stash[blk[0]] = blk[2]
+            # descend by the d-th leaf bit: left child on 0, right child on 1
+            i = 2 * i + 1 + ((x >> (server.L - 1 - d)) & 1)
+            path_down.append(i)
 
         # add leaf bucket blocks to stash
         """decrypt leaf bucket as a whole"""
-        cur_leaf_bucket_in_bytes = server.tree[i]
-        data_to_authenticate = f"bucket_{i}".encode('utf-8')
-        decrypted_leaf_bucket = self.aesgcm_ciphers[i].decrypt(self.nonces[i], cur_leaf_bucket_in_bytes, data_to_authenticate)
-        # add blocks to stash
-        self.stash += [deserialize_block(block) for block in decrypted_leaf_bucket.split(b"||")]
+        cur_leaf_bucket_in_bytes = server.read_bucket(i)
+        decrypted_leaf_bucket = self._open_bucket(i, cur_leaf_bucket_in_bytes)
+        # parse only the real blocks announced by the count prefix
+        blocks = np.frombuffer(decrypted_leaf_bucket, dtype=BLOCK_DTYPE,
+                               count=decrypted_leaf_bucket[0], offset=1)
+        for blk in blocks.tolist():
+            self.stash[blk[0]] = blk[2]
 
         # read block a from stash
         data = None
-        block_idx = -1
-        for block in self.stash:
-            if block.a == a:
-                block_idx = self.stash.index(block)
-                data = block.data
-                break
+        stored = self.stash.get(a)
+        if stored is not None:
+            data = stored.decode('utf-8')
 
         """Update block: If the access is a write, update the data of block a"""
         if op == "write":
-            if block_idx >= 0:
-                self.stash[block_idx] = Block(a, new_x, data_, False)
-            else:
-                self.stash.append(Block(a, new_x, data_, False))
+            self.stash[a] = data_.encode('utf-8')
         # if op is delete, delete the block from stash
         elif op == "delete":
-            self.stash.remove(self.stash[block_idx])
+            self.stash.pop(a, None)
 
         """Write the path back to the server's tree storage"""
-        # traversal from leaf to root, write each bucket exactly one time
-        path_back = self.get_path_leaf_to_root(x, server.L)
-
-        for level in range(len(path_back)):  # length is L
-            blocks_to_add = []
-            # check if non dummy block/s can be written at current level
-            for block in self.stash:
-                if block.dummy_flag == True:
-                    continue
-                else:
-                    leaf = self.position_map[block.a]
-                    # retrieve block's path
-                    cur_block_path = self.get_path_leaf_to_root(leaf, server.L)
-                    # if there is an intersection in the same level in the tree of the 2 paths
-                    if cur_block_path[level] == path_back[level]:
-                        # add block to bucket if there is enough space
-                        if len(blocks_to_add) < server.Z:
-                            blocks_to_add.append(block)
-                        # else overflow to stash (block is already in stash)
-
-            # pad bucket with dummy blocks
-            num_of_dummies = server.Z - len(blocks_to_add)
-            for _ in range(num_of_dummies):
-                # add dummy block
-                blocks_to_add.append(Block(server.N+1, 0, "----", True))
-
-            """encrypt bucket as a whole"""
-            # create new bucket
-            new_bucket = Bucket(blocks_to_add, server.Z, server.N, False)
-            # create new nonce
-            new_nonce = os.urandom(12)
-            self.nonces[path_back[level]] = new_nonce
-            data_to_encrypt = b"||".join([block.serialize() for block in new_bucket.blocks])
-            data_to_authenticate = f"bucket_{path_back[level]}".encode('utf-8')
-            # write bucket to tree
-            server.tree[path_back[level]] = self.aesgcm_ciphers[path_back[level]].\
-                encrypt(new_nonce, data_to_encrypt, data_to_authenticate)
-
-            # remove real added block/s from stash
-            for block_ in blocks_to_add:
-                if block_.dummy_flag == False:
-                    self.stash.remove(block_)
-
-        # clear stash of dummies
-        self.stash = [block for block in self.stash if block.dummy_flag == False]
+        # traversal from leaf to root, write each bucket exactly one time;
+        # the descent already collected the bucket indices, so just reverse
+        path_back = path_down[::-1]
+        # single greedy sweep over the stash (compiled kernel when built):
+        # two leaves share the ancestor at shift s iff their labels agree in
+        # the top bits, i.e. iff (leaf1 ^ leaf2).bit_length() <= s
+        addresses = list(self.stash)
+        leaves = self.position_map[addresses].tolist() if addresses else []
+        level_addresses = plan_eviction(addresses, leaves, x, server.L, server.Z)
+
+        # one urandom syscall for all write-back nonces instead of one each
+        nonce_pool = os.urandom(12 * len(path_back))
+        for level, added_addresses in enumerate(level_addresses):
+            # serialize only the real blocks behind a count prefix; zero
+            # padding to the fixed bucket size replaces materialized dummy
+            # blocks, and the ciphertext length observed by the server is
+            # unchanged
+            reals = np.zeros(len(added_addresses), dtype=BLOCK_DTYPE)
+            for j, blk_a in enumerate(added_addresses):
+                reals[j] = (blk_a, self.position_map[blk_a], self.stash[blk_a], 0)
+            payload = bytes([len(added_addresses)]) + reals.tobytes()
+            payload = payload.ljust(self.bucket_plain, b'\x00')
+
+            """encrypt bucket as a whole and write it back"""
+            new_nonce = nonce_pool[12 * level:12 * level + 12]
+            server.write_bucket(path_back[level], self._seal_bucket(path_back[level], new_nonce, payload))
+
+            # remove added block/s from stash
+            for blk_a in added_addresses:
+                del self.stash[blk_a]
 
         return data
 
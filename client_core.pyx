@@ -0,0 +1,54 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled kernel for the interpreter-bound part of Client.Access.
+
+Build in place with:
+
+    python setup.py build_ext --inplace
+
+client.py falls back to an equivalent pure-Python implementation when the
+compiled module is missing, so building it is optional.
+"""
+
+
+cdef inline int _bit_length(long v):
+    cdef int n = 0
+    while v:
+        v >>= 1
+        n += 1
+    return n
+
+
+def plan_eviction(list addresses, list leaves, long x, int L, int Z):
+    """
+    greedy leaf-to-root eviction planning: bucket each stash block by its
+    depth bound (leaf ^ x).bit_length() and drop it into the deepest level
+    of the write-back path that still has a free slot
+    :param addresses: stash block addresses
+    :param leaves: the leaf mapped to each address, same order
+    :param x: the leaf of the path being written back
+    :param L: height of the tree
+    :param Z: bucket capacity
+    :return: list of L+1 address lists, leaf to root
+    """
+    cdef Py_ssize_t n = len(addresses)
+    cdef int nlevels = L + 1
+    cdef Py_ssize_t i
+    cdef int d, level
+    cdef int[64] fill
+    level_addresses = [[] for _ in range(nlevels)]
+    by_depth = [[] for _ in range(nlevels)]
+    for level in range(nlevels):
+        fill[level] = 0
+    for i in range(n):
+        d = _bit_length(<long>leaves[i] ^ x)
+        by_depth[d].append(addresses[i])
+    for d in range(nlevels):
+        for blk_a in by_depth[d]:
+            level = d
+            while level < nlevels and fill[level] >= Z:
+                level += 1
+            if level < nlevels:
+                level_addresses[level].append(blk_a)
+                fill[level] += 1
+    return level_addresses
@@ -0,0 +1,7 @@
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="path-oram",
+    ext_modules=cythonize("client_core.pyx"),
+)